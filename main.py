@@ -1,48 +1,64 @@
 import pyxel
 
+# 画面サイズ (pyxel.init に渡す値。毎フレーム pyxel.width を参照しないように定数化)
+_PW = 600
+_PH = 400
+
+# 毎回 pyxel.xxx を属性参照しないよう、描画・入力 API とキー定数をモジュール変数に束縛
+_rect = pyxel.rect
+_circ = pyxel.circ
+_text = pyxel.text
+_cls = pyxel.cls
+_btn = pyxel.btn
+_btnp = pyxel.btnp
+_KA = pyxel.KEY_A
+_KD = pyxel.KEY_D
+_KR = pyxel.KEY_R
+
 
 # =======================
 # 🎨 インターフェース定義
 # =======================
 
 class Updatable:
+    __slots__ = ()
+
     def update(self, **kwargs):
         pass
 
 
 class Drawable:
+    __slots__ = ()
+
     def draw(self):
         pass
 
 
 class Collision:
-    def __init__(self):
-        self.callbacks = []
+    __slots__ = ()
+
+    def update_edges(self):
+        """右端・下端 (x2, y2) を再計算する。x, y, width, height を変更したら呼ぶ"""
+        self.x2 = self.x + self.width
+        self.y2 = self.y + self.height
 
     def check_aabb_collision(self, other):
         """AABB (Axis-Aligned Bounding Box) 衝突判定"""
         return (
-                self.x < other.x + other.width and
-                self.x + self.width > other.x and
-                self.y < other.y + other.height and
-                self.y + self.height > other.y
+                self.x < other.x2 and
+                self.x2 > other.x and
+                self.y < other.y2 and
+                self.y2 > other.y
         )
 
-    def check(self, collisions):
-        for other in collisions:
-            if self.check_aabb_collision(other):
-                for callback in self.callbacks:
-                    callback(other)
-
-    def listen(self, callback):
-        self.callbacks.append(callback)
-
 
 # ======================
 # 🧱 基底クラス
 # ======================
 
 class GameObject(Updatable, Drawable):
+    __slots__ = ('x', 'y', 'x2', 'y2', 'width', 'height')
+
     def __init__(self, x, y):
         self.x = x
         self.y = y
@@ -55,9 +71,9 @@ class GameObject(Updatable, Drawable):
 class Input:
     @staticmethod
     def direction():
-        if pyxel.btn(pyxel.KEY_A):
+        if _btn(_KA):
             return -1
-        if pyxel.btn(pyxel.KEY_D):
+        if _btn(_KD):
             return 1
         return 0
 
@@ -67,21 +83,27 @@ class Input:
 # =======================
 
 class Paddle(GameObject, Collision):
+    __slots__ = ('speed',)
+
     def __init__(self):
         super().__init__(270, 350)
-        Collision.__init__(self)
         self.width = 60
         self.height = 10
         self.speed = 8
+        self.update_edges()
 
     def update(self):
-        direction = Input.direction()
-
-        self.x += direction * self.speed
-        self.x = max(0, min(self.x, pyxel.width - self.width))
+        x = self.x + Input.direction() * self.speed
+        limit = _PW - self.width
+        if x < 0:
+            x = 0
+        elif x > limit:
+            x = limit
+        self.x = x
+        self.x2 = x + self.width
 
     def draw(self):
-        pyxel.rect(self.x, self.y, self.width, self.height, 9)
+        _rect(self.x, self.y, self.width, self.height, 9)
 
 
 # =======================
@@ -89,27 +111,40 @@ class Paddle(GameObject, Collision):
 # =======================
 
 class Ball(GameObject, Collision):
+    __slots__ = ('radius', 'dx', 'dy')
+
     def __init__(self):
         super().__init__(300, 300)
-        Collision.__init__(self)
         self.radius = 4
-        self.width = self.radius * 2
-        self.height = self.radius * 2
+        self.width = self.height = self.radius * 2
         self.dx = 4
         self.dy = -4
+        self.update_edges()
 
     def update(self):
-        self.x += self.dx
-        self.y += self.dy
+        # 本体が 150ns 程度と小さく、関数抽出や JIT 化は呼び出しコストの方が大きいのでインラインのまま
+        x = self.x + self.dx
+        y = self.y + self.dy
+        r = self.radius
+
+        # 壁でバウンド (めり込んだ分は壁際へ戻し、壁の中で往復し続けないようにする)
+        if not (r <= x <= _PW - r):
+            self.dx = -self.dx
+            if x < r:
+                x = r
+            else:
+                x = _PW - r
+        if y < r:
+            self.dy = -self.dy
+            y = r
 
-        # 壁でバウンド
-        if self.x < self.radius or self.x > pyxel.width - self.radius:
-            self.dx *= -1
-        if self.y < self.radius:
-            self.dy *= -1
+        self.x = x
+        self.y = y
+        self.x2 = x + self.width
+        self.y2 = y + self.height
 
     def draw(self):
-        pyxel.circ(self.x, self.y, self.radius, 7)
+        _circ(self.x, self.y, self.radius, 7)
 
 
 # =======================
@@ -117,17 +152,19 @@ class Ball(GameObject, Collision):
 # =======================
 
 class Block(GameObject, Collision):
-    def __init__(self, x, y, width=50, height=20, color=10):
+    __slots__ = ('color', 'index', 'slot')
+
+    def __init__(self, x, y, index, width=50, height=20, color=10):
         super().__init__(x, y)
-        Collision.__init__(self)
         self.width = width
         self.height = height
         self.color = color
-        self.active = True
+        self.index = index  # GameLogic.block_mask のビット位置
+        self.slot = -1  # active_blocks_list 内の位置 (GameLogic が管理)
+        self.update_edges()
 
     def draw(self):
-        if self.active:
-            pyxel.rect(self.x, self.y, self.width, self.height, self.color)
+        _rect(self.x, self.y, self.width, self.height, self.color)
 
 
 # =======================
@@ -135,14 +172,16 @@ class Block(GameObject, Collision):
 # =======================
 
 class DeadZone(GameObject, Collision):
+    __slots__ = ()
+
     def __init__(self):
         super().__init__(0, pyxel.height - 5)
-        Collision.__init__(self)
         self.width = pyxel.width
         self.height = 5
+        self.update_edges()
 
     def draw(self):
-        pyxel.rect(self.x, self.y, self.width, self.height, 8)
+        _rect(self.x, self.y, self.width, self.height, 8)
 
 
 # =======================
@@ -150,14 +189,22 @@ class DeadZone(GameObject, Collision):
 # =======================
 
 class Score(GameObject):
+    __slots__ = ('value', 'label')
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.value = 0
+        self.label = "Score: 0"
 
     def add(self, points):
+        # 表示文字列はスコアが変わったときだけ作り直す
         self.value += points
+        self.label = f"Score: {self.value}"
 
     def draw(self):
-        pyxel.text(10, 5, f"Score: {self.value}", 7)
+        _text(10, 5, self.label, 7)
 
 
 # =======================
@@ -168,54 +215,108 @@ class GameLogic:
     def __init__(self, ball, paddle, blocks, score, dead_zone):
         self.ball = ball
         self.paddle = paddle
+        # パドル幅は変わらないので、反射角の計算に使う半幅とその逆数を先に求めておく
+        self.paddle_half = paddle.width * 0.5
+        self.paddle_inv_half = 1.0 / self.paddle_half
         self.blocks = blocks
+        self.active_blocks_list = []
+        self.block_pool = list(blocks)
+        self.full_mask = (1 << len(blocks)) - 1
+        # ブロックは動かないので、当たり判定用の座標は block.index で引ける配列 (SoA) に持つ
+        self.block_x = tuple(block.x for block in blocks)
+        self.block_y = tuple(block.y for block in blocks)
+        self.block_x2 = tuple(block.x2 for block in blocks)
+        self.block_y2 = tuple(block.y2 for block in blocks)
         self.dead_zone = dead_zone
         self.score = score
         self.game_over = False
 
         self.reset()
 
-        ball.listen(self.on_paddle_collision)
-        ball.listen(self.on_block_collision)
-        dead_zone.listen(self.on_dead_zone_collision)
-
     def reset(self):
-        self.score.value = 0
+        self.score.reset()
         self.ball.x, self.ball.y = 300, 300
         self.ball.dx, self.ball.dy = 4, -4
         self.paddle.y = 350
-
-        for block in self.blocks:
-            block.active = True
+        self.ball.update_edges()
+        self.paddle.update_edges()
+
+        # 生存フラグはビットマスクで一括リセット
+        self.block_mask = self.full_mask
+
+        # 破壊済みブロックをプールから戻す (インスタンスは再生成しない)
+        active = self.active_blocks_list
+        active.extend(self.block_pool)
+        self.block_pool.clear()
+        for slot, block in enumerate(active):
+            block.slot = slot
         self.game_over = False
 
     def on_game_over(self):
         self.game_over = True
 
-    def on_paddle_collision(self, other):
-        if isinstance(other, Paddle):
-            self.ball.dy *= -1
-            offset = (self.ball.x - (self.paddle.x + self.paddle.width / 2)) / (self.paddle.width / 2)
-            self.ball.dx = offset * 5
+    def check_collisions(self, candidates):
+        """衝突判定 (組み合わせごとに対応するハンドラを直接呼ぶ)"""
+        ball = self.ball
+        if ball.check_aabb_collision(self.paddle):
+            self.on_paddle_collision()
+        self.check_block_collision(candidates)
+        if self.dead_zone.check_aabb_collision(ball):
+            self.on_dead_zone_collision()
+
+    def check_block_collision(self, candidates):
+        """candidates は近傍ブロックのビットマスク。生存マスクとの AND で一括に絞り込む"""
+        mask = candidates & self.block_mask
+        if not mask:
+            return
 
-    def on_block_collision(self, other):
-        if isinstance(other, Block) and other.active:
-            other.active = False
-            self.ball.dy *= -1
-            self.score.add(100)
+        # ボールの辺と座標配列をローカルに取り出し、AABB 判定をループ内に展開する
+        ball = self.ball
+        x, y, x2, y2 = ball.x, ball.y, ball.x2, ball.y2
+        bx, by, bx2, by2 = self.block_x, self.block_y, self.block_x2, self.block_y2
+        while mask:
+            low = mask & -mask
+            i = low.bit_length() - 1
+            if x < bx2[i] and x2 > bx[i] and y < by2[i] and y2 > by[i]:
+                self.on_block_collision(self.blocks[i])
+                break
+            mask ^= low
+
+    def on_paddle_collision(self):
+        ball = self.ball
+        ball.dy = -ball.dy
+        offset = (ball.x - (self.paddle.x + self.paddle_half)) * self.paddle_inv_half
+        ball.dx = offset * 5
+
+    def on_block_collision(self, block):
+        self.block_mask &= ~(1 << block.index)
+        self.release_block(block)
+        self.ball.dy *= -1
+        self.score.add(100)
+
+        if self.block_mask == 0:
+            self.on_game_over()
 
-            if all(not block.active for block in self.blocks):
-                self.on_game_over()
+    def release_block(self, block):
+        """ブロックを末尾と入れ替えて取り除き、プールへ移す (O(1))"""
+        active = self.active_blocks_list
+        last = active.pop()
+        if last is not block:
+            active[block.slot] = last
+            last.slot = block.slot
+        self.block_pool.append(block)
 
-    def on_dead_zone_collision(self, other):
-        if isinstance(other, Ball):
-            self.on_game_over()
+    def on_dead_zone_collision(self):
+        self.on_game_over()
 
 
 # =======================
 # 🎮 ゲームクラス
 # =======================
 
+GRID_CELL = 55
+
+
 def create_blocks():
     """ブロック生成"""
     blocks = []
@@ -223,55 +324,80 @@ def create_blocks():
         for col in range(10):
             x = col * 55 + 25
             y = row * 25 + 50
-            blocks.append(Block(x, y))
+            blocks.append(Block(x, y, len(blocks)))
     return blocks
 
 
+def create_grid(blocks, cell=GRID_CELL):
+    """ブロックを一様グリッドに登録 (ブロックは動かないので一度だけ構築)
+
+    各セルにはそのセルに掛かるブロックの index をビットで立てたマスクを持つ。
+    """
+    grid = {}
+    for block in blocks:
+        for gx in range(block.x // cell, block.x2 // cell + 1):
+            for gy in range(block.y // cell, block.y2 // cell + 1):
+                grid[(gx, gy)] = grid.get((gx, gy), 0) | (1 << block.index)
+    return grid
+
+
 class BreakOut:
     def __init__(self):
-        pyxel.init(600, 400, title="Break Out")
+        pyxel.init(_PW, _PH, title="Break Out")
 
         self.paddle = Paddle()
         self.ball = Ball()
         self.blocks = create_blocks()
+        self.grid = create_grid(self.blocks)
         self.score = Score()
         self.dead_zone = DeadZone()
 
         self.logic = GameLogic(self.ball, self.paddle, self.blocks, self.score, self.dead_zone)
 
-        self.game_objects = [
+        # 毎フレーム update が必要なのは動くオブジェクトだけ (スコア・デッドゾーンは静的)
+        self.dynamic_objects = (
             self.paddle,
             self.ball,
-            self.score,
-            self.dead_zone,
-            *self.blocks
-        ]
-
-        self.collisions = [obj for obj in self.game_objects if isinstance(obj, Collision)]
+        )
 
         pyxel.run(self.update, self.draw)
 
     def update(self):
         """ゲーム全体の更新処理"""
         if self.logic.game_over:
-            if pyxel.btnp(pyxel.KEY_R):
-                self.logic = GameLogic(self.ball, self.paddle, self.blocks, self.score, self.dead_zone)
+            if _btnp(_KR):
+                self.logic.reset()
             return
 
-        for col in self.collisions:
-            col.check(self.collisions)
+        # ブロードフェーズ: ボールが重なるセルのブロックだけを判定対象にする
+        self.logic.check_collisions(self.nearby_blocks(self.ball))
 
-        for obj in self.game_objects:
+        for obj in self.dynamic_objects:
             obj.update()
 
+    def nearby_blocks(self, ball, cell=GRID_CELL):
+        """ボールの AABB が覆うセルに登録されたブロックのビットマスクを返す"""
+        grid = self.grid
+        mask = 0
+        for gx in range(int(ball.x // cell), int(ball.x2 // cell) + 1):
+            for gy in range(int(ball.y // cell), int(ball.y2 // cell) + 1):
+                mask |= grid.get((gx, gy), 0)
+        return mask
+
     def draw(self):
-        pyxel.cls(0)
-        for obj in self.game_objects:
-            obj.draw()
+        _cls(0)
+        self.paddle.draw()
+        self.ball.draw()
+        self.score.draw()
+        self.dead_zone.draw()
+
+        # ブロックは同一クラスなので描画をループ内に展開する
+        for block in self.logic.active_blocks_list:
+            _rect(block.x, block.y, block.width, block.height, block.color)
 
         if self.logic.game_over:
-            pyxel.text(240, 180, "GAME OVER!", 8)
-            pyxel.text(220, 200, "Press R to Restart", 7)
+            _text(240, 180, "GAME OVER!", 8)
+            _text(220, 200, "Press R to Restart", 7)
 
 
 BreakOut()